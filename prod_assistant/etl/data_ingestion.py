@@ -1,27 +1,37 @@
 import os
+import asyncio
+import hashlib
 import pandas as pd
+from itertools import chain
 from dotenv import load_dotenv
-from typing import List
+from typing import Iterator, List
 from langchain_core.documents import Document
 from langchain_astradb import AstraDBVectorStore
 from prod_assistant.utils.model_loader import ModelLoader
 from prod_assistant.utils.config_loader import load_config
+from prod_assistant.logger import GLOBAL_LOGGER as log
 
 class DataIngestion:
     """
     Class to handle data transformation and ingestion into AstraDB vector store.
     """
 
+    expected_columns = ["product_id", "product_title", "rating", "total_reviews", "price", "top_reviews"]
+    # all columns are read as str directly (no type inference). Rating too: it can be numeric or "N/A", and inferring it
+    # per chunk would give float in one chunk and str in another, i.e. "4.5" vs 4.5 in the stored metadata
+    column_dtypes = {"product_id": str, "product_title": str, "rating": str, "total_reviews": str, "price": str, "top_reviews": str}
+
     def __init__(self): # methods with __ are called render methods
         """
         Initialize environment variables, embedding model, and set CSV file path.
         """
-        print("Initializing DataIngestion pipeline...")
+        log.info("Initializing DataIngestion pipeline")
         self.model_loader=ModelLoader()
         self._load_env_variables()
         self.csv_path = self._get_csv_path()
-        self.product_data = self._load_csv()
         self.config=load_config()
+        self.vstore = None
+        self._seen_keys = set() # content hashes already sent to AstraDB during this run
 
     def _load_env_variables(self):
         """
@@ -55,37 +65,51 @@ class DataIngestion:
 
         return csv_path
 
-    def _load_csv(self):
+    def _load_csv(self, chunksize: int = 10_000) -> Iterator[pd.DataFrame]:
         """
-        Load product data from CSV.
+        Stream product data from CSV in chunks of `chunksize` rows,
+        so memory usage does not grow with the size of the file.
         """
-        df = pd.read_csv(self.csv_path)
-        expected_columns = {'product_id','product_title', 'rating', 'total_reviews','price', 'top_reviews'}
-
-        if not expected_columns.issubset(set(df.columns)):
-            raise ValueError(f"CSV must contain columns: {expected_columns}")
-
-        return df
-
-    def transform_data(self):
+        # the pyarrow engine would parse faster but doesn't support chunksize, so the C engine is kept
+        try:
+            reader = pd.read_csv(
+                self.csv_path,
+                engine="c",
+                chunksize=chunksize,
+                usecols=self.expected_columns, # only needed columns are parsed; missing ones raise here
+                dtype=self.column_dtypes,
+            )
+        except ValueError as e:
+            raise ValueError(f"CSV must contain columns: {set(self.expected_columns)}") from e
+
+        with reader:
+            yield from reader
+
+    def _rows_to_docs(self, chunk: pd.DataFrame) -> List[Document]:
         """
-        Transform product data into list of LangChain Document objects.
+        Convert a DataFrame chunk into LangChain Document objects.
         """
-        documents = []
-        
-        for _, row in self.product_data.iterrows():
-            metadata = {
-                "product_id": row["product_id"],
-                "product_title": row["product_title"],
-                "rating": row["rating"],
-                "total_reviews": row["total_reviews"],
-                "price": row["price"]
-            } # review is content and the rest is metadata
-            doc = Document(page_content=row["top_reviews"], metadata=metadata)
-            documents.append(doc)
-
-        print(f"Transformed {len(documents)} documents.")
-        return documents
+        records = chunk[self.expected_columns].to_dict("records") # plain dicts are much cheaper than the per-row Series built by iterrows()
+
+        # review is content and the rest is metadata. Title, price and rating are also prepended to the content,
+        # so they are part of the embedding and queries like "cheap iphone" match even if reviews don't say it
+        # (retriever.doc_format.review_text strips that line again when docs are shown to the LLM)
+        return [
+            Document(
+                page_content=f"{r['product_title']} | price {r['price']} | rating {r['rating']}\n{r.pop('top_reviews')}",
+                metadata=r,
+            )
+            for r in records
+        ]
+
+    def transform_data(self, chunksize: int = 10_000) -> Iterator[List[Document]]:
+        """
+        Transform product data into batches of LangChain Document objects, one batch per CSV chunk.
+        """
+        for chunk in self._load_csv(chunksize=chunksize):
+            documents = self._rows_to_docs(chunk)
+            log.info("Transformed documents", count=len(documents))
+            yield documents
 
 # We do our own Document loader from csv instead of using CSVLoader from langchain, because we want custom metadata
 # CSVLoader puts everything to page_content, and metadata is just a path to the file
@@ -101,41 +125,121 @@ class DataIngestion:
 #  So beautiful, so elegant, just a vowww😍❤️ READ MORE Akshay Meena Certified Buyer , Jaipur Nov, 2023 897 202 Permalink Report Abuse')
 
 
-    def store_in_vector_db(self, documents: List[Document]):
+    def _get_vector_store(self) -> AstraDBVectorStore:
+        """
+        Create the AstraDB vector store once and reuse it for every inserted batch.
+        """
+        if not self.vstore:
+            # collection name is the db name you defined for AstraDB
+            astra_config = self.config["astra_db"]
+            collection_name=astra_config["collection_name"]
+            # with vectorize AstraDB embeds the documents itself, so no client embedding model is passed
+            vectorize_options = self.model_loader.load_vectorize_options()
+            self.vstore = AstraDBVectorStore(
+                embedding= None if vectorize_options else self.model_loader.load_embeddings(),
+                collection_vector_service_options=vectorize_options,
+                collection_name=collection_name,
+                api_endpoint=self.db_api_endpoint,
+                token=self.db_application_token,
+                namespace=self.db_keyspace,
+                metric=astra_config.get("metric"),
+                collection_indexing_policy=astra_config.get("indexing_policy"),
+            )
+        return self.vstore
+
+    @staticmethod
+    def _content_key(doc: Document) -> str:
+        """
+        Stable id for a document derived from its content, so identical reviews map to the same AstraDB row.
+        """
+        return hashlib.blake2b(doc.page_content.encode("utf-8"), digest_size=16).hexdigest()
+
+    async def _ainsert_batches(self, vstore: AstraDBVectorStore, batches: List[List[Document]],
+                               id_batches: List[List[str]], max_concurrency: int):
+        """
+        Insert document batches concurrently, capping the number of in-flight requests.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def _insert(batch: List[Document], ids: List[str]):
+            async with semaphore:
+                return await vstore.aadd_documents(batch, ids=ids)
+
+        # gather keeps the results in the same order as the batches
+        return await asyncio.gather(*[_insert(b, ids) for b, ids in zip(batches, id_batches)])
+
+    async def astore_in_vector_db(self, documents: List[Document], insert_batch_size: int = 500, max_concurrency: int = 8):
         """
         Store documents into AstraDB vector store.
+
+        Duplicate reviews are skipped, and the content hash is used as the document id
+        so re-ingesting the same data upserts instead of creating new rows.
+        Documents are sorted by length, split into batches of `insert_batch_size` and inserted concurrently
+        (at most `max_concurrency` batches at a time), since the embedding calls are network bound.
+        Returned ids follow the original order of the (deduplicated) `documents`.
+        The cached vector store's async client is bound to the event loop it first ran on,
+        so all calls must be awaited on the same loop (see `arun_pipeline`).
         """
-        # collection name is the db name you defined for AstraDB
-        collection_name=self.config["astra_db"]["collection_name"]
-        vstore = AstraDBVectorStore(
-            embedding= self.model_loader.load_embeddings(),
-            collection_name=collection_name,
-            api_endpoint=self.db_api_endpoint,
-            token=self.db_application_token,
-            namespace=self.db_keyspace,
-        )
-
-        inserted_ids = vstore.add_documents(documents)
-        print(f"Successfully inserted {len(inserted_ids)} documents into AstraDB.")
+        vstore = self._get_vector_store()
+
+        unique_docs, keys = [], []
+        for doc in documents:
+            key = self._content_key(doc)
+            if key in self._seen_keys:
+                continue
+            self._seen_keys.add(key)
+            unique_docs.append(doc)
+            keys.append(key)
+        skipped = len(documents) - len(unique_docs)
+        if skipped:
+            log.info("Skipped duplicate documents", count=skipped)
+
+        # sort by length so each embedding batch holds reviews of similar size (less padding waste)
+        order = sorted(range(len(unique_docs)), key=lambda i: len(unique_docs[i].page_content))
+        sorted_docs = [unique_docs[i] for i in order]
+        sorted_keys = [keys[i] for i in order]
+
+        batches = [sorted_docs[i:i + insert_batch_size] for i in range(0, len(sorted_docs), insert_batch_size)]
+        id_batches = [sorted_keys[i:i + insert_batch_size] for i in range(0, len(sorted_keys), insert_batch_size)]
+        results = await self._ainsert_batches(vstore, batches, id_batches, max_concurrency)
+        sorted_ids = list(chain.from_iterable(results))
+
+        # map the ids back to the original document order
+        inserted_ids = [None] * len(sorted_ids)
+        for position, doc_id in zip(order, sorted_ids):
+            inserted_ids[position] = doc_id
+        log.info("Inserted documents into AstraDB", count=len(inserted_ids))
         # return loaded vector store and inserted ids
         return vstore, inserted_ids
 
-    def run_pipeline(self):
+    async def arun_pipeline(self):
         """
-        Run the full data ingestion pipeline: transform data and store into vector DB.
+        Async data ingestion pipeline: transform data and store into vector DB.
+        Runs on a single event loop, so the AstraDB async client is reused across all CSV chunks.
         """
-        documents = self.transform_data()
-        vstore, _ = self.store_in_vector_db(documents)
+        # CSV chunks are transformed and inserted one at a time, the full dataset is never held in memory
+        vstore, total_inserted = self._get_vector_store(), 0
+        for documents in self.transform_data():
+            vstore, inserted_ids = await self.astore_in_vector_db(documents)
+            total_inserted += len(inserted_ids)
+        log.info("Ingestion finished", total_inserted=total_inserted)
 
         #Optionally do a quick search
         query = "Can you tell me the low budget iphone?"
-        results = vstore.similarity_search(query)
+        results = await vstore.asimilarity_search(query)
 
-        print(f"\nSample search results for query: '{query}'")
+        log.info("Sample search finished", query=query, results=len(results))
         for res in results:
-            print(f"Content: {res.page_content}\nMetadata: {res.metadata}\n")
+            log.debug("Sample search result", content=res.page_content, metadata=res.metadata)
+
+    def run_pipeline(self):
+        """
+        Run the full data ingestion pipeline: transform data and store into vector DB.
+        """
+        self.vstore = None  # a store cached by an earlier run is bound to that run's (closed) event loop
+        asyncio.run(self.arun_pipeline())
 
 # Run if this file is executed directly
 if __name__ == "__main__":
     ingestion = DataIngestion()
-    ingestion.run_pipeline()
\ No newline at end of file
+    ingestion.run_pipeline()
@@ -2,20 +2,44 @@ import csv
 import time
 import re
 import os
-from bs4 import BeautifulSoup
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from bs4 import BeautifulSoup, SoupStrainer
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By # used to select elements on the page
 from selenium.webdriver.common.keys import Keys # used to automate scrolling and actions like click, send_keys, etc.
 from selenium.webdriver.common.action_chains import ActionChains # used to make multiple actions in a chain
+from selenium.webdriver.support.ui import WebDriverWait # used to wait for page state instead of fixed sleeps
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from webdriver_manager.chrome import ChromeDriverManager
+from prod_assistant.logger import GLOBAL_LOGGER as log
+
+# Only review-like blocks are parsed from product pages (covers the review selectors of every platform);
+# the rest of the DOM is skipped by the parser
+REVIEW_STRAINER = SoupStrainer(["div", "span"], class_=re.compile(r"review|comment|_27M-vq|EPCmJX|_6K-7Co"))
 
 # Ecommerce websites scraper
 class EcommerceScraper:
-    def __init__(self, output_dir="data", platform="alza"):
+    # upper bound (seconds) for explicit waits; they return as soon as the page is ready
+    wait_timeout = 10
+    # total wait for reviews across the scrolls; the old fixed sleeps took 4 x 1.5s, products without reviews must not wait longer
+    review_wait = 6
+
+    # compiled once, used for every scraped product
+    _ID_PATTERNS = {
+        "alza": re.compile(r"/([^/]+)\.htm"),
+        "amazon_de": re.compile(r"/dp/([^/]+)"),
+        "flipkart": re.compile(r"/p/(itm[0-9A-Za-z]+)"),
+    }
+    _REVIEWS_COUNT_RE = re.compile(r"\d+(,\d+)?")
+
+    def __init__(self, output_dir="data", platform="alza", max_workers=4):
         self.output_dir = output_dir
         self.platform = platform.lower()
+        self.max_workers = max_workers
         # create directory if it doesn't exist
         os.makedirs(self.output_dir, exist_ok=True)
         
@@ -53,10 +77,25 @@ class EcommerceScraper:
             }
         }
 
-    def get_top_reviews(self, product_url, count=2):
-        """Get the top reviews for a product based on platform."""
-        # config = self.platform_configs[self.platform]
-        
+        self.review_selectors = {
+            "alza": ["div.review-item", "div.review-text", "div.comment"],
+            "amazon_de": ["div[data-hook='review-body']", "span[data-hook='review-body']", "div.review-text"],
+            "flipkart": ["div._27M-vq", "div.col.EPCmJX", "div._6K-7Co"]
+        }
+
+        # options and chromedriver binary are resolved once and shared by every driver we start
+        self._options = self._build_options()
+        self._driver_path = ChromeDriverManager().install()
+
+        # one browser for the whole scraper lifetime: Chrome start-up is the most expensive step
+        self._driver = self._new_driver()
+        # pool of review drivers, started on first use and shared by all worker threads
+        self._driver_pool = None
+        self._pool_size = 0
+
+    @staticmethod
+    def _build_options():
+        """Chrome options used by every scraper driver."""
         options = Options()
         options.add_argument("--no-sandbox")
         options.add_argument("--disable-blink-features=AutomationControlled")
@@ -66,34 +105,91 @@ class EcommerceScraper:
         options.add_argument("--disable-features=VizDisplayCompositor")
         options.add_experimental_option("excludeSwitches", ["enable-automation"])
         options.add_experimental_option('useAutomationExtension', False)
-        
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
-        
+        return options
+
+    def _new_driver(self):
+        """Start a Chrome driver with the cached options and chromedriver path."""
+        # a Service owns one chromedriver process, so each driver gets its own (cheap) Service object
+        return webdriver.Chrome(service=Service(self._driver_path), options=self._options)
+
+    def _get_driver_pool(self, size=0):
+        """Review drivers kept in a queue for check-out. The pool grows to `size` drivers
+        (at most `max_workers`) and is reused by later calls."""
+        if self._driver_pool is None:
+            self._driver_pool = queue.Queue()
+            self._pool_size = 0
+        while self._pool_size < min(size, self.max_workers):
+            self._driver_pool.put(self._new_driver())
+            self._pool_size += 1
+        return self._driver_pool
+
+    def _recycle_driver(self, driver):
+        """Clean a used driver's session for the next page. A crashed browser or invalid session
+        is quit and replaced by a new driver, so it is never handed out again."""
+        try:
+            driver.delete_all_cookies() # clean session for the next page instead of restarting the browser
+            return driver
+        except WebDriverException as e:
+            log.warning("Browser is unusable, starting a new one", error=str(e))
+            try:
+                driver.quit()
+            except WebDriverException:
+                pass # the browser may already be gone
+            return self._new_driver()
+
+    def close(self):
+        """Quit the shared browser and all pooled review browsers."""
+        if self._driver is not None:
+            self._driver.quit()
+            self._driver = None
+        if self._driver_pool is not None:
+            while not self._driver_pool.empty():
+                self._driver_pool.get_nowait().quit()
+            self._driver_pool = None
+            self._pool_size = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def get_top_reviews(self, product_url, count=2, driver=None):
+        """Get the top reviews for a product based on platform."""
+        # config = self.platform_configs[self.platform]
         if not product_url.startswith("http"):
-            driver.quit()
             return "No reviews found"
 
+        driver = driver or self._driver
+
         try:
-            driver.get(product_url)
-            time.sleep(4)
-            
+            driver.get(product_url) # blocks until the page has loaded (default page load strategy)
+
             # Close popups (platform-specific)
             self._close_popups(driver)
             
-            # Scroll to load reviews
-            for _ in range(4):
+            # Scroll to load reviews, stop as soon as the first review is in the DOM
+            any_review = ", ".join(self.review_selectors.get(self.platform, ["div.review"]))
+            scrolls = 4
+            for _ in range(scrolls):
                 ActionChains(driver).send_keys(Keys.END).perform()
-                time.sleep(1.5)
+                try:
+                    WebDriverWait(driver, self.review_wait / scrolls).until(
+                        EC.presence_of_element_located((By.CSS_SELECTOR, any_review))
+                    )
+                    break
+                except TimeoutException:
+                    continue
 
-            soup = BeautifulSoup(driver.page_source, "html.parser")
+            soup = BeautifulSoup(driver.page_source, "lxml", parse_only=REVIEW_STRAINER) # lxml is a C parser, much faster than html.parser
             reviews = self._extract_reviews_by_platform(soup, count)
             
         except Exception as e:
-            print(f"Error getting reviews: {e}")
+            log.error("Error getting reviews", url=product_url, error=str(e))
             reviews = []
 
-        driver.quit()
+        if driver is self._driver: # pooled drivers are recycled by _scrape_one
+            self._driver = self._recycle_driver(driver)
         return " || ".join(reviews) if reviews else "No reviews found"
     
     def _close_popups(self, driver):
@@ -111,13 +207,7 @@ class EcommerceScraper:
     
     def _extract_reviews_by_platform(self, soup, count):
         """Extract reviews based on platform-specific selectors."""
-        review_selectors = {
-            "alza": ["div.review-item", "div.review-text", "div.comment"],
-            "amazon_de": ["div[data-hook='review-body']", "span[data-hook='review-body']", "div.review-text"],
-            "flipkart": ["div._27M-vq", "div.col.EPCmJX", "div._6K-7Co"]
-        }
-        
-        selectors = review_selectors.get(self.platform, ["div.review"])
+        selectors = self.review_selectors.get(self.platform, ["div.review"])
         seen = set()
         reviews = []
         
@@ -136,30 +226,27 @@ class EcommerceScraper:
         return reviews
     
     def scrape_products(self, query, max_products=1, review_count=2):
-        """Scrape products based on platform and search query."""
+        """Scrape products based on platform and search query.
+        Rows are yielded one by one as their reviews are ready, so callers can stream them (e.g. into save_to_csv)."""
         config = self.platform_configs[self.platform]
-        
-        options = Options()
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-blink-features=AutomationControlled")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--disable-gpu")
-        options.add_argument("--disable-web-security")
-        options.add_argument("--disable-features=VizDisplayCompositor")
-        options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        options.add_experimental_option('useAutomationExtension', False)
-        
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
+
+        driver = self._driver
         search_url = config["search_url"].format(query=query.replace(' ', '+'))
-        driver.get(search_url)
-        time.sleep(4)
+        try:
+            driver.get(search_url)
+        except WebDriverException:
+            self._driver = self._recycle_driver(driver) # don't keep a crashed browser for the next query
+            raise
+        try:
+            WebDriverWait(driver, self.wait_timeout).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, config["product_selector"]))
+            )
+        except TimeoutException:
+            log.warning("No products appeared before timeout", query=query, timeout=self.wait_timeout)
 
         # Close popups
         self._close_popups(driver)
-        time.sleep(2)
         
-        products = []
         items = driver.find_elements(By.CSS_SELECTOR, config["product_selector"])
         
         # Filter out sponsored products for Amazon
@@ -167,26 +254,50 @@ class EcommerceScraper:
             items = [item for item in items if "Sponsored" not in item.text]
         
         items = items[:max_products]
-        
+
+        # read all search results first: the shared driver leaves this page when fetching reviews,
+        # which would make the remaining item elements stale
+        products_data = []
         for item in items:
             try:
                 product_data = self._extract_product_data(item, config)
                 if product_data:
-                    top_reviews = self.get_top_reviews(product_data["link"], count=review_count)
-                    products.append([
-                        product_data["id"], 
-                        product_data["title"], 
-                        product_data["rating"], 
-                        product_data["total_reviews"], 
-                        product_data["price"], 
-                        top_reviews
-                    ])
+                    products_data.append(product_data)
             except Exception as e:
-                print(f"Error occurred while processing item: {e}")
-                continue
+                log.error("Error occurred while processing item", error=str(e))
+
+        if not products_data:
+            return
 
-        driver.quit()
-        return products
+        # reviews are fetched in parallel, each worker on its own browser from the pool;
+        # no more browsers than products (the default of one product needs a single review browser)
+        workers = min(self.max_workers, len(products_data))
+        self._get_driver_pool(workers) # start the pool here, not concurrently inside the workers
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(self._scrape_one, product_data, review_count) for product_data in products_data]
+            for future in futures:
+                try:
+                    yield future.result()
+                except Exception as e:
+                    log.error("Error occurred while processing item", error=str(e))
+                    continue
+
+    def _scrape_one(self, product_data, review_count):
+        """Fetch reviews for one product using a driver checked out from the pool."""
+        pool = self._get_driver_pool()
+        driver = pool.get()
+        try:
+            top_reviews = self.get_top_reviews(product_data["link"], count=review_count, driver=driver)
+        finally:
+            pool.put(self._recycle_driver(driver)) # return a usable driver so the next product can use it
+        return [
+            product_data["id"], 
+            product_data["title"], 
+            product_data["rating"], 
+            product_data["total_reviews"], 
+            product_data["price"], 
+            top_reviews
+        ]
     
     def _extract_product_data(self, item, config):
         """Extract product data based on platform configuration."""
@@ -202,7 +313,7 @@ class EcommerceScraper:
                 
             try:
                 reviews_text = item.find_element(By.CSS_SELECTOR, config["reviews_selector"]).text.strip()
-                match = re.search(r"\d+(,\d+)?", reviews_text)
+                match = self._REVIEWS_COUNT_RE.search(reviews_text)
                 total_reviews = match.group(0) if match else "N/A"
             except:
                 total_reviews = "N/A"
@@ -224,28 +335,23 @@ class EcommerceScraper:
                 "link": product_link
             }
         except Exception as e:
-            print(f"Error extracting product data: {e}")
+            log.error("Error extracting product data", error=str(e))
             return None
     
     def _extract_product_id(self, href, base_url):
         """Extract product ID from URL based on platform."""
         try:
-            if self.platform == "alza":
-                match = re.findall(r"/([^/]+)\.htm", href)
-                return match[0] if match else "N/A"
-            elif self.platform == "amazon_de":
-                match = re.findall(r"/dp/([^/]+)", href)
-                return match[0] if match else "N/A"
-            elif self.platform == "flipkart":
-                match = re.findall(r"/p/(itm[0-9A-Za-z]+)", href)
-                return match[0] if match else "N/A"
-            else:
+            pattern = self._ID_PATTERNS.get(self.platform)
+            if pattern is None:
                 return "N/A"
+            match = pattern.findall(href)
+            return match[0] if match else "N/A"
         except:
             return "N/A"
     
     def save_to_csv(self, data, filename="product_reviews.csv"):
-        """Save the scraped product reviews to a CSV file."""
+        """Save the scraped product reviews to a CSV file.
+        `data` can be any iterable of rows (list or the scrape_products generator); rows are written as they arrive."""
         if os.path.isabs(filename):
             path = filename
         elif os.path.dirname(filename):  # filename includes subfolder like 'data/product_reviews.csv'
@@ -255,8 +361,10 @@ class EcommerceScraper:
             # plain filename like 'output.csv'
             path = os.path.join(self.output_dir, filename)
 
-        with open(path, "w", newline="", encoding="utf-8") as f:
+        # 1 MB write buffer -> far fewer write() syscalls on large scrapes
+        with open(path, "w", newline="", encoding="utf-8", buffering=1 << 20) as f:
             writer = csv.writer(f)
             writer.writerow(["product_id", "product_title", "rating", "total_reviews", "price", "top_reviews"])
-            writer.writerows(data)
+            for row in data:
+                writer.writerow(row)
         
\ No newline at end of file
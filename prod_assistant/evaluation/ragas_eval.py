@@ -1,3 +1,4 @@
+import atexit
 import asyncio
 from utils.model_loader import ModelLoader
 from ragas import SingleTurnSample # ragas is similar to deepeval -> for evaluation of RAG systems
@@ -17,12 +18,34 @@ model_loader=ModelLoader()
 # You need asyncio here because:
 # ragas (and possibly grpc.experimental.aio) exposes async methods that must be awaited.
 # You’re mixing sync outer functions with async inner calls.
-# asyncio.run() bridges that gap.
-def evaluate_context_precision(query, response, retrieved_context):
-    """“Did the retriever bring in useful and focused information for the query and response?”
-        It measures how much of the retrieved context was actually useful for answering the question, according to the LLM evaluator.
-        So even if you retrieved 5 paragraphs, if only 1 is relevant, your context precision will be low.
-    """
+# Instead of asyncio.run() per call (new event loop + gRPC/SSL setup every time),
+# one event loop and one set of scorers are kept for the whole process.
+# The loop is created on the first sync call, not at import: retrieval.py (and with it the MCP server
+# and the workflows) imports this module without ever using the sync wrappers.
+_LOOP = None
+_CONTEXT_PRECISION = None
+_RESPONSE_RELEVANCY = None
+
+def _get_scorers():
+    """Build the evaluator LLM, embeddings and metrics on first use and reuse them afterwards."""
+    global _CONTEXT_PRECISION, _RESPONSE_RELEVANCY
+    if _CONTEXT_PRECISION is None:
+        evaluator_llm = LangchainLLMWrapper(model_loader.load_llm())
+        evaluator_embeddings = LangchainEmbeddingsWrapper(model_loader.load_embeddings())
+        _CONTEXT_PRECISION = LLMContextPrecisionWithoutReference(llm=evaluator_llm)
+        _RESPONSE_RELEVANCY = ResponseRelevancy(llm=evaluator_llm, embeddings=evaluator_embeddings)
+    return _CONTEXT_PRECISION, _RESPONSE_RELEVANCY
+
+def _get_loop():
+    """Event loop shared by the sync wrappers, created on first use."""
+    global _LOOP
+    if _LOOP is None or _LOOP.is_closed():
+        _LOOP = asyncio.new_event_loop()
+        atexit.register(_LOOP.close)
+    return _LOOP
+
+async def aevaluate_context_precision(query, response, retrieved_context):
+    """Async version of evaluate_context_precision, so many samples can be scored with asyncio.gather."""
     try:
         sample = SingleTurnSample(
             user_input=query,
@@ -30,18 +53,54 @@ def evaluate_context_precision(query, response, retrieved_context):
             retrieved_contexts=retrieved_context,
         )
         # we don't know exact answer (no reference). We evaluate the query, llm response, and retrieved context
-        async def main():
-            llm = model_loader.load_llm()
-            evaluator_llm = LangchainLLMWrapper(llm)
-            context_precision = LLMContextPrecisionWithoutReference(llm=evaluator_llm)
-            result = await context_precision.single_turn_ascore(sample) # requires async calling
-            return result
-        # since your top-level evaluate_context_precision() is a normal function (not async), you can’t await directly in it.
-        # that's why you need to call asyncio.run(main())
-        return asyncio.run(main())
+        context_precision, _ = _get_scorers()
+        return await context_precision.single_turn_ascore(sample) # requires async calling
     except Exception as e:
         return e
 
+async def aevaluate_response_relevancy(query, response, retrieved_context):
+    """Async version of evaluate_response_relevancy, so many samples can be scored with asyncio.gather."""
+    try:
+        sample = SingleTurnSample(
+            user_input=query,
+            response=response,
+            retrieved_contexts=retrieved_context,
+        )
+        _, scorer = _get_scorers()
+        return await scorer.single_turn_ascore(sample)
+    except Exception as e:
+        return e
+
+async def _ascore_batch(metric, samples, concurrency):
+    """Score samples concurrently, at most `concurrency` evaluator calls in flight.
+    Failed samples come back as the exception, same as the single-sample functions."""
+    sem = asyncio.Semaphore(concurrency)
+
+    async def _one(sample):
+        async with sem:
+            return await metric.single_turn_ascore(sample)
+
+    return await asyncio.gather(*[_one(s) for s in samples], return_exceptions=True)
+
+async def aevaluate_context_precision_batch(samples, concurrency=8):
+    """Context precision for a list of SingleTurnSample, evaluated in parallel. Results keep the input order."""
+    context_precision, _ = _get_scorers()
+    return await _ascore_batch(context_precision, samples, concurrency)
+
+async def aevaluate_response_relevancy_batch(samples, concurrency=8):
+    """Response relevancy for a list of SingleTurnSample, evaluated in parallel. Results keep the input order."""
+    _, scorer = _get_scorers()
+    return await _ascore_batch(scorer, samples, concurrency)
+
+def evaluate_context_precision(query, response, retrieved_context):
+    """“Did the retriever bring in useful and focused information for the query and response?”
+        It measures how much of the retrieved context was actually useful for answering the question, according to the LLM evaluator.
+        So even if you retrieved 5 paragraphs, if only 1 is relevant, your context precision will be low.
+    """
+    # since evaluate_context_precision() is a normal function (not async), you can’t await directly in it.
+    # that's why the coroutine runs on the shared module-level loop
+    return _get_loop().run_until_complete(aevaluate_context_precision(query, response, retrieved_context))
+
 def evaluate_response_relevancy(query, response, retrieved_context):
     """“Is the model’s generated response relevant and supported by the retrieved context?”
         This measures how well the LLM’s output aligns with the retrieved evidence.
@@ -51,22 +110,4 @@ def evaluate_response_relevancy(query, response, retrieved_context):
             • ignore the retrieved info altogether.
         This metric penalizes that.
     """
-    try:
-        sample = SingleTurnSample(
-            user_input=query,
-            response=response,
-            retrieved_contexts=retrieved_context,
-        )
-
-        async def main():
-            llm = model_loader.load_llm()
-            evaluator_llm = LangchainLLMWrapper(llm)
-            embedding_model = model_loader.load_embeddings()
-            evaluator_embeddings = LangchainEmbeddingsWrapper(embedding_model)
-            scorer = ResponseRelevancy(llm=evaluator_llm, embeddings=evaluator_embeddings)
-            result = await scorer.single_turn_ascore(sample)
-            return result
-
-        return asyncio.run(main())
-    except Exception as e:
-        return e
\ No newline at end of file
+    return _get_loop().run_until_complete(aevaluate_response_relevancy(query, response, retrieved_context))
@@ -1,5 +1,8 @@
 import os
+import queue
+import atexit
 import logging
+from logging.handlers import QueueHandler, QueueListener
 from datetime import datetime
 import structlog
 
@@ -25,18 +28,27 @@ class CustomLogger:
         console_handler.setLevel(logging.INFO)
         console_handler.setFormatter(logging.Formatter("%(message)s"))
 
+        # Callers only put records on a queue; a background thread does the actual console/file I/O,
+        # so logging inside hot loops doesn't block on writes
+        log_queue = queue.Queue(-1)
+        listener = QueueListener(log_queue, console_handler, file_handler, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop) # flush remaining records on exit
+
         logging.basicConfig(
             level=logging.INFO,
             format="%(message)s",  # Structlog will handle JSON rendering
-            handlers=[console_handler, file_handler]
+            handlers=[QueueHandler(log_queue)]
         )
 
         # Configure structlog for JSON structured logging
         structlog.configure(
             processors=[
+                structlog.stdlib.filter_by_level, # drop disabled levels (e.g. debug) before any formatting work
                 structlog.processors.TimeStamper(fmt="iso", utc=True, key="timestamp"),
                 structlog.processors.add_log_level,
                 structlog.processors.EventRenamer(to="event"),
+                structlog.processors.format_exc_info, # log.exception(...) -> render the traceback into the JSON line
                 structlog.processors.JSONRenderer()
             ],
             logger_factory=structlog.stdlib.LoggerFactory(),
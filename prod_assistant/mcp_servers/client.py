@@ -23,28 +23,30 @@ async def main():
         retriever_tool = next(t for t in tools if t.name == "get_product_info")
         web_tool = next(t for t in tools if t.name == "web_search")
 
-        # --- Step 1: Try retriever first ---
+        # --- Fire retriever and web search concurrently ---
         #query = "Samsung Galaxy S25 price"
         # query = "iPhone 15"
         query = "Dell Laptop?"
-        print(f"Querying retriever with: {query}")
+        print(f"Querying retriever and web search with: {query}")
+        # web search starts speculatively, so on a retriever miss its latency is already (partly) paid
+        r_task = asyncio.create_task(retriever_tool.ainvoke({"query": query}))
+        w_task = asyncio.create_task(web_tool.ainvoke({"query": query}))
+
         try:
-            retriever_result = await asyncio.wait_for(
-                retriever_tool.ainvoke({"query": query}), 
-                timeout=30.0
-            )
-            print("\nRetriever Result:\n", retriever_result)
-        except asyncio.TimeoutError:
-            print("Retriever timed out after 30 seconds")
-            retriever_result = "Timeout error"
+            retriever_result = await r_task
+        except Exception as e:
+            print(f"Retriever failed: {e}")
+            retriever_result = ""
+        print("\nRetriever Result:\n", retriever_result)
 
-        # --- Step 2: Fallback to web search if retriever fails ---
         # it can happen that the retriever fails to find the results
         # it is because we use mmr with similarity threshold.
         # So, if the similarity is less than the threshold, the document is not returned
-        if not retriever_result.strip() or "No local results found." in retriever_result:
-            print("\n No local results, falling back to web search...\n")
-            web_result = await web_tool.ainvoke({"query": query})
+        if retriever_result.strip() and "No local results found." not in retriever_result:
+            w_task.cancel() # local hit -> web result not needed
+        else:
+            print("\n No local results, using web search...\n")
+            web_result = await w_task
             print("Web Search Result:\n", web_result)
             
     except Exception as e:
@@ -1,66 +1,70 @@
 # module for creating a server
 # you can host your server on local machine or on a remote server
+import os
 from mcp.server.fastmcp import FastMCP
-from retriever.retrieval import Retriever # own code <- VDB <- ETL <- website scraping
+from retriever.retrieval import get_retriever # own code <- VDB <- ETL <- website scraping
+from retriever.doc_format import format_docs
 from langchain_community.tools import DuckDuckGoSearchRun
+from logger import GLOBAL_LOGGER as log
 
 # Initialize MCP server and add tools under MCP
 mcp = FastMCP("hybrid_search")
 
-# Load retriever once
-retriever_obj = Retriever()
-retriever = retriever_obj.load_retriever()
+# Shared retriever, loaded on the first tool call
+retriever_obj = get_retriever()
 
-# LangChain DuckDuckGo tool
-duckduckgo = DuckDuckGoSearchRun()
-# we use MCP to expose tools to web. So you and other people can use your tools
-# ---------- Helpers ----------
-def format_docs(docs) -> str:
-    """Format retriever docs into readable context."""
-    if not docs:
-        return ""
-    formatted_chunks = []
-    for d in docs:
-        meta = d.metadata or {}
-        formatted = (
-            f"Title: {meta.get('product_title', 'N/A')}\n"
-            f"Price: {meta.get('price', 'N/A')}\n"
-            f"Rating: {meta.get('rating', 'N/A')}\n"
-            f"Reviews:\n{d.page_content.strip()}"
-        )
-        formatted_chunks.append(formatted)
-    return "\n\n---\n\n".join(formatted_chunks)
+def warm_up():
+    """The first query pays for the embedding client / connection setup, do it at startup
+    instead of inside the first real (time-limited) request.
+    Only the embedding + vector search path is warmed, the LLM filter is skipped on purpose."""
+    try:
+        retriever_obj.load_retriever()
+        retriever_obj.vstore.similarity_search("warmup", k=1)
+    except Exception as e:
+        log.warning("Server: retriever warm-up failed", error=str(e))
 
+# LangChain DuckDuckGo tool, created on first web search to keep server start-up fast
+_duckduckgo = None
+
+def get_duckduckgo() -> DuckDuckGoSearchRun:
+    """Return the shared DuckDuckGo tool, creating it on first use."""
+    global _duckduckgo
+    if _duckduckgo is None:
+        _duckduckgo = DuckDuckGoSearchRun()
+    return _duckduckgo
+# we use MCP to expose tools to web. So you and other people can use your tools
 # ---------- MCP Tools ----------
 @mcp.tool()
 async def get_product_info(query: str) -> str:
     """Retrieve product information for a given query from local retriever."""
     try:
-        print(f"Server: Starting retrieval for query: {query}")
-        docs = retriever.invoke(query)
-        print(f"Server: Retrieved {len(docs) if docs else 0} documents")
+        log.debug("Server: starting retrieval", query=query)
+        docs = await retriever_obj.acall_retriever(query) # query cache + (adaptive) fetch_k, without blocking the server loop
+        log.debug("Server: retrieved documents", count=len(docs) if docs else 0)
         context = format_docs(docs)
         if not context.strip():
-            print("Server: No context found, returning 'No local results found.'")
+            log.info("Server: no context found", query=query)
             return "No local results found."
-        print(f"Server: Returning context of length {len(context)}")
+        log.debug("Server: returning context", length=len(context))
         return context
     except Exception as e:
-        print(f"Server: Error in get_product_info: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        log.exception("Server: error in get_product_info", error=str(e))
         return f"Error retrieving product info: {str(e)}"
 
 @mcp.tool()
 async def web_search(query: str) -> str:
     """Search the web using DuckDuckGo if retriever has no results."""
     try:
-        return duckduckgo.run(query)
+        return get_duckduckgo().run(query)
     except Exception as e:
         return f"Error during web search: {str(e)}"
 
 # ---------- Run Server ----------
 if __name__ == "__main__":
-    print("Starting MCP server with stdio transport...")
+    # langchain-mcp-adapters starts a new stdio server process for every tool call, so a warm-up there would only
+    # add a vector search to each call. Enable it (MCP_WARMUP=1) for long-lived servers, e.g. streamable-http.
+    if os.getenv("MCP_WARMUP") == "1":
+        warm_up()
+    log.info("Starting MCP server with stdio transport")
     mcp.run(transport="stdio")
     # mcp.run(transport="streamable-http")
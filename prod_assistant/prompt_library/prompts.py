@@ -14,6 +14,10 @@ class PromptTemplate:
         self.template = template.strip() # strip whitespaces from the template. Example of the whitespace is \n\n
         self.description = description
         self.version = version
+        # templates are immutable, so placeholders are parsed once instead of on every format() call
+        self._required = tuple(
+            field_name for _, field_name, _, _ in string.Formatter().parse(self.template) if field_name
+        )
 
     def format(self, **kwargs) -> str:
         """Instead of just calling template.format(**kwargs) and potentially getting
@@ -40,7 +44,7 @@ class PromptTemplate:
         """
         # Validate placeholders before formatting
         missing = [
-            f for f in self.required_placeholders() if f not in kwargs
+            f for f in self._required if f not in kwargs
         ]
         if missing:
             raise ValueError(f"Missing placeholders: {missing}")
@@ -48,9 +52,9 @@ class PromptTemplate:
 
     def required_placeholders(self):
         """This uses Python's string.Formatter().parse() to automatically
-         detect all {placeholder} variables in the template."""
+         detect all {placeholder} variables in the template (parsed once in __init__)."""
 
-        return [field_name for _, field_name, _, _ in string.Formatter().parse(self.template) if field_name]
+        return list(self._required)
 
 
 # Central Registry -> our main prompt
@@ -0,0 +1,68 @@
+import re
+import json
+from typing import Optional, Sequence
+from pydantic import ConfigDict
+from langchain_core.callbacks import Callbacks
+from langchain_core.documents import Document
+from langchain_core.documents.compressor import BaseDocumentCompressor
+from langchain_core.language_models import BaseLanguageModel
+
+# a JSON list of integers, e.g. [0, 2]; the last one in the answer is used (reasoning models may "think" first)
+_INDEX_LIST_RE = re.compile(r"\[\s*\d*(?:\s*,\s*\d+)*\s*\]")
+
+_FILTER_PROMPT = (
+    "You are filtering search results for a product question.\n"
+    "Query: {query}\n"
+    "Docs:\n{docs}\n\n"
+    "Return the indices of the docs that are relevant to the query as a JSON list of integers, "
+    "e.g. [0, 2]. Return [] if none are relevant. Return only the JSON list."
+)
+
+
+class BatchedLLMFilter(BaseDocumentCompressor):
+    """
+    Relevance filter that asks the LLM about all retrieved documents in a single call.
+    Drop-in replacement for LLMChainFilter, which makes one LLM call per document.
+    """
+
+    llm: BaseLanguageModel
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    def _build_prompt(self, documents: Sequence[Document], query: str) -> str:
+        docs = "\n".join(f"[{i}] {d.page_content}" for i, d in enumerate(documents))
+        return _FILTER_PROMPT.format(query=query, docs=docs)
+
+    @staticmethod
+    def _select(documents: Sequence[Document], answer) -> Sequence[Document]:
+        """Keep the documents whose indices the LLM returned. If the answer can't be parsed, keep everything."""
+        text = getattr(answer, "content", answer)
+        matches = _INDEX_LIST_RE.findall(str(text))
+        if not matches:
+            return list(documents)
+        try:
+            indices = json.loads(matches[-1])
+        except ValueError:
+            return list(documents)
+        return [documents[i] for i in dict.fromkeys(indices) if 0 <= i < len(documents)]
+
+    def compress_documents(
+        self,
+        documents: Sequence[Document],
+        query: str,
+        callbacks: Optional[Callbacks] = None,
+    ) -> Sequence[Document]:
+        if not documents:
+            return []
+        answer = self.llm.invoke(self._build_prompt(documents, query), config={"callbacks": callbacks})
+        return self._select(documents, answer)
+
+    async def acompress_documents(
+        self,
+        documents: Sequence[Document],
+        query: str,
+        callbacks: Optional[Callbacks] = None,
+    ) -> Sequence[Document]:
+        if not documents:
+            return []
+        answer = await self.llm.ainvoke(self._build_prompt(documents, query), config={"callbacks": callbacks})
+        return self._select(documents, answer)
@@ -0,0 +1,31 @@
+from typing import Sequence
+from langchain_core.documents import Document
+
+
+def review_text(d: Document) -> str:
+    """Review text of a doc, without the "title | price | rating" line that ingestion prepends for the embedding."""
+    content = d.page_content.strip()
+    title = (d.metadata or {}).get("product_title")
+    if title and content.startswith(f"{title} | price "):
+        return content.partition("\n")[2].strip()
+    return content
+
+
+def format_doc(d: Document) -> str:
+    """Format a single retrieved doc as a Title / Price / Rating / Reviews block.
+    If any of the keys are missing, 'N/A' is used as the value."""
+    meta = d.metadata or {}
+    return (
+        f"Title: {meta.get('product_title', 'N/A')}\n"
+        f"Price: {meta.get('price', 'N/A')}\n"
+        f"Rating: {meta.get('rating', 'N/A')}\n"
+        f"Reviews:\n{review_text(d)}"
+    )
+
+
+def format_docs(docs: Sequence[Document], empty: str = "") -> str:
+    """Format retrieved docs into one context block for the prompt; `empty` is returned when there are no docs."""
+    if not docs:
+        return empty
+    # single join over a generator: no intermediate list of formatted chunks
+    return "\n\n---\n\n".join(format_doc(d) for d in docs)
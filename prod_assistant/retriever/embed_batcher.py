@@ -0,0 +1,72 @@
+import asyncio
+from typing import List
+from langchain_core.embeddings import Embeddings
+
+
+class EmbedBatcher(Embeddings):
+    """
+    Embeddings wrapper that merges concurrent `aembed_query` calls into one batch request.
+    Queries awaited in the same event-loop tick (e.g. under asyncio.gather) are sent together
+    through `aembed_documents`; the batch is flushed early once it reaches `max_batch_size`.
+    Sync methods are passed straight through.
+    """
+
+    def __init__(self, embeddings: Embeddings, max_batch_size: int = 32):
+        self.embeddings = embeddings
+        self.max_batch_size = max_batch_size
+        self._pending = []  # (text, future) waiting for the next flush
+        self._flush_task = None
+        self._inflight = set()  # early flushes of full batches
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.embeddings.aembed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            # full batch: send it right away; the task is kept so it isn't garbage collected mid-flight
+            batch, self._pending = self._pending, []
+            task = loop.create_task(self._send(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+        elif self._flush_task is None:
+            self._flush_task = loop.create_task(self._flush_soon())
+            # a task cancelled before its first step never runs its body (nor its finally)
+            self._flush_task.add_done_callback(self._clear_flush_task)
+        return await future
+
+    def _clear_flush_task(self, task):
+        if self._flush_task is task:
+            self._flush_task = None
+
+    async def _flush_soon(self):
+        try:
+            await asyncio.sleep(0)  # let the other coroutines of this tick enqueue their queries
+        finally:
+            # reset even if cancelled, otherwise no later query would ever schedule a flush
+            self._flush_task = None
+        batch, self._pending = self._pending, []
+        if batch:
+            await self._send(batch)
+
+    async def _send(self, batch):
+        try:
+            # queries must keep the query task type, otherwise Google embeds them as documents
+            vectors = await self.embeddings.aembed_documents([text for text, _ in batch], task_type="RETRIEVAL_QUERY")
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), vector in zip(batch, vectors):
+            if not future.done():
+                future.set_result(vector)
@@ -0,0 +1,71 @@
+import time
+import threading
+from collections import OrderedDict
+
+
+class QueryCache:
+    """
+    Thread-safe LRU cache with TTL expiration for retriever results.
+    The least recently used entry is evicted when `max_size` is reached,
+    and entries older than `ttl_seconds` are treated as missing.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 300):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._data = OrderedDict()  # key -> (stored_at, value)
+        self._lock = threading.RLock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key):
+        """
+        Return the cached value for `key`, or None if it is missing or expired.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+
+            stored_at, value = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._data[key]
+                self._misses += 1
+                return None
+
+            self._data.move_to_end(key)  # mark as most recently used
+            self._hits += 1
+            return value
+
+    def put(self, key, value):
+        """
+        Store `value` under `key`, evicting the least recently used entry if the cache is full.
+        """
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        """
+        Drop all entries and reset the counters.
+        """
+        with self._lock:
+            self._data.clear()
+            self._hits = 0
+            self._misses = 0
+
+    def stats(self) -> dict:
+        """
+        Return hit/miss counters, current size and hit rate.
+        """
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "size": len(self._data),
+                "hit_rate": self._hits / total if total else 0.0,
+            }
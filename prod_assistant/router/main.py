@@ -6,6 +6,7 @@ from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from langchain_core.messages import HumanMessage
+import uuid
 from workflow.agentic_rag_workflow_with_websearch import AgenticRAG
 
 app = FastAPI()
@@ -20,6 +21,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ---------- Startup ----------
+@app.on_event("startup")
+async def load_agent():
+    """Build the agent once per process; every request reuses its compiled graph, LLM and retriever."""
+    app.state.rag_agent = AgenticRAG()
+    # connect to AstraDB now, not inside the first request
+    app.state.rag_agent.retriever_obj.load_retriever()
+
 # ---------- FastAPI Endpoints ----------
 @app.get("/", response_class=HTMLResponse)
 async def index(request: Request):
@@ -29,8 +38,14 @@ async def index(request: Request):
 @app.post("/get", response_class=HTMLResponse)
 async def chat(msg: str = Form(...)):
     """Call the Agentic RAG workflow."""
-    rag_agent = AgenticRAG()
-    answer = rag_agent.run(msg)   # run() already returns final answer string
+    rag_agent = app.state.rag_agent
+    # the agent is shared, so each request gets its own thread: no answers or history leak between users.
+    # The chat UI has no session, so the thread is dropped afterwards instead of piling up in the checkpointer.
+    thread_id = str(uuid.uuid4())
+    try:
+        answer = rag_agent.run(msg, thread_id=thread_id)   # run() already returns final answer string
+    finally:
+        rag_agent.checkpointer.delete_thread(thread_id)
     print(f"Agentic Response: {answer}")
     return answer
 # uvicorn router.main:app --port 8000
\ No newline at end of file
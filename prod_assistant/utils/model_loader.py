@@ -6,6 +6,7 @@ from utils.config_loader import load_config
 from langchain_google_genai import GoogleGenerativeAIEmbeddings, ChatGoogleGenerativeAI
 from langchain_openai import ChatOpenAI
 from langchain_groq import ChatGroq
+from astrapy.info import VectorServiceOptions
 from logger import GLOBAL_LOGGER as log
 from exception.custom_exception import ProductAssistantException
 import asyncio
@@ -93,6 +94,23 @@ class ModelLoader:
             raise ProductAssistantException("Failed to load embedding model", sys)
 
 
+    def load_vectorize_options(self):
+        """
+        Return AstraDB vectorize (server-side embedding) options if `astra_db.vectorize` is configured, else None.
+        """
+        vectorize = self.config.get("astra_db", {}).get("vectorize")
+        if not vectorize:
+            return None
+
+        log.info("Using AstraDB vectorize", provider=vectorize["provider"], model=vectorize["model_name"])
+        provider_key = vectorize.get("provider_key")
+        return VectorServiceOptions(
+            provider=vectorize["provider"],
+            model_name=vectorize["model_name"],
+            authentication={"providerKey": provider_key} if provider_key else None,
+        )
+
+
     def load_llm(self):
         """
         Load and return the configured LLM model.
@@ -6,7 +6,8 @@ from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
 
 from prompt_library.prompts import PROMPT_REGISTRY, PromptType
-from retriever.retrieval import Retriever
+from retriever.retrieval import get_retriever
+from retriever.doc_format import format_docs
 from utils.model_loader import ModelLoader
 from langgraph.checkpoint.memory import MemorySaver
 import asyncio
@@ -21,28 +22,12 @@ class AgenticRAG:
 
     def __init__(self):
         self.model_loader = ModelLoader()
-        self.retriever_obj = Retriever(self.model_loader)
+        self.retriever_obj = get_retriever() # shared across AgenticRAG instances
         self.llm = self.model_loader.load_llm()
         self.checkpointer = MemorySaver() # in memory state management. For production, use PostgreSQLSaver!
         self.workflow = self._build_workflow() # we build and then compile the workflow
         self.app = self.workflow.compile(checkpointer=self.checkpointer)
 
-    # ---------- Helpers ----------
-    def _format_docs(self, docs) -> str:
-        if not docs:
-            return "No relevant documents found."
-        formatted_chunks = []
-        for d in docs:
-            meta = d.metadata or {}
-            formatted = (
-                f"Title: {meta.get('product_title', 'N/A')}\n"
-                f"Price: {meta.get('price', 'N/A')}\n"
-                f"Rating: {meta.get('rating', 'N/A')}\n"
-                f"Reviews:\n{d.page_content.strip()}"
-            )
-            formatted_chunks.append(formatted)
-        return "\n\n---\n\n".join(formatted_chunks)
-
     # ---------- Nodes ----------
     def _ai_assistant(self, state: AgentState):
         print("--- CALL ASSISTANT ---")
@@ -67,7 +52,7 @@ class AgenticRAG:
         query = state["messages"][-1].content
         retriever = self.retriever_obj.load_retriever()
         docs = retriever.invoke(query)
-        context = self._format_docs(docs)
+        context = format_docs(docs, empty="No relevant documents found.")
         return {"messages": [HumanMessage(content=context)]}
 
     def _grade_documents(self, state: AgentState) -> Literal["generator", "rewriter"]:
@@ -1,17 +1,28 @@
-from typing import Annotated, Sequence, TypedDict, Literal
+from typing import Annotated, AsyncIterator, Sequence, TypedDict, Literal
+from langchain_core.runnables import RunnableConfig
 from langchain_core.messages import BaseMessage, HumanMessage
-from langchain_core.prompts import ChatPromptTemplate, PromptTemplate
+from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
 
 from prompt_library.prompts import PROMPT_REGISTRY, PromptType
-from retriever.retrieval import Retriever
+from retriever.retrieval import get_retriever
+from retriever.doc_format import format_docs
+from retriever.embed_batcher import EmbedBatcher
 from utils.model_loader import ModelLoader
 from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+import aiosqlite
+import re
 import asyncio
+import numpy as np
 from evaluation.ragas_eval import evaluate_context_precision, evaluate_response_relevancy
 from langchain_mcp_adapters.client import MultiServerMCPClient
+from langchain_community.tools import DuckDuckGoSearchRun
+
+# questions mentioning any of these words are routed to the tools (single pass, no lowercased copy)
+_ROUTE_PATTERN = re.compile(r"\b(price|review|product)", re.IGNORECASE)
 
 
 class AgenticRAG:
@@ -19,16 +30,58 @@ class AgenticRAG:
 
     class AgentState(TypedDict):
         messages: Annotated[Sequence[BaseMessage], add_messages]
+        web_context: str    # web search result fetched alongside the retriever
+        context_ok: bool    # grader verdict: is the chosen context good enough to answer
+        route: Literal["tool", "end"] | None  # assistant decision, read by the router instead of scanning message text
+        question: str       # current turn's question; messages keep the whole thread history
         
     async def async_init(self):
-        self.mcp_tools = await self.mcp_client.get_tools()
+        if self.sqlite_path and self._db_conn is None:
+            # the async saver binds to the running loop, so it can only be built here and not in __init__
+            self._db_conn = await aiosqlite.connect(self.sqlite_path)
+            self.checkpointer = AsyncSqliteSaver(self._db_conn)
+            self.app = self.workflow.compile(checkpointer=self.checkpointer)
+        if self.use_mcp and self.mcp_tools is None:
+            self.mcp_tools = await self.mcp_client.get_tools()
+            self.mcp_tools_by_name = {t.name: t for t in self.mcp_tools} # O(1) tool lookup inside the graph nodes
+        self._initialized = True
+
+    async def aclose(self):
+        """Close the SQLite checkpoint connection, if one was opened."""
+        if self._db_conn is not None:
+            await self._db_conn.close()
+            self._db_conn = None
 
-    def __init__(self):
+    def __init__(self, use_mcp: bool = True):
+        # use_mcp=False calls the retriever in-process instead of through the MCP server
+        self.use_mcp = use_mcp
         self.model_loader = ModelLoader()
-        self.retriever_obj = Retriever(self.model_loader)
+        self.retriever_obj = get_retriever() # shared across AgenticRAG instances
         self.llm = self.model_loader.load_llm()
+        # used by the grader instead of an LLM call; the batcher embeds question and context in one request
+        self.embeddings = EmbedBatcher(self.model_loader.load_embeddings())
+        self.grade_threshold = self.model_loader.config.get("retriever", {}).get("grade_threshold", 0.55)
+        self.grade_max_chars = self.model_loader.config.get("retriever", {}).get("grade_max_chars", 1500)
+        # conversation checkpoints go to SQLite on disk, so long-running servers don't keep every thread's
+        # full history in memory. Async saver because the graph runs with ainvoke / astream_events;
+        # it is swapped in by async_init, until then (or with sqlite_path: null) MemorySaver is used.
+        self.sqlite_path = self.model_loader.config.get("checkpointer", {}).get("sqlite_path")
+        self._db_conn = None
+        self._initialized = False
         self.checkpointer = MemorySaver()
 
+        # Prompt chains are built once here, nodes only invoke them
+        self._assistant_chain = ChatPromptTemplate.from_template(
+            "You are a helpful assistant. Answer the user directly.\n\nQuestion: {question}\nAnswer:"
+        ) | self.llm | StrOutputParser()
+        self._generator_chain = ChatPromptTemplate.from_template(
+            PROMPT_REGISTRY[PromptType.PRODUCT_BOT].template
+        ) | self.llm | StrOutputParser()
+        self._rewriter_chain = ChatPromptTemplate.from_template(
+            "Rewrite this user query to make it more clear and specific for a search engine. "
+            "Do NOT answer the query. Only rewrite it.\n\nQuery: {question}\nRewritten Query:"
+        ) | self.llm | StrOutputParser()
+
         # MCP Client Init
         self.mcp_client = MultiServerMCPClient({
             "hybrid_search": {
@@ -38,6 +91,9 @@ class AgenticRAG:
             }
         })
         self.mcp_tools = None  # Will be loaded in async_init
+        self.mcp_tools_by_name = {}
+        # in-process web search, only needed when the MCP server is not used
+        self.web_search_tool = None if use_mcp else DuckDuckGoSearchRun()
         self.workflow = self._build_workflow()
         self.app = self.workflow.compile(checkpointer=self.checkpointer)
 
@@ -47,72 +103,102 @@ class AgenticRAG:
         messages = state["messages"]
         last_message = messages[-1].content
 
-        if any(word in last_message.lower() for word in ["price", "review", "product"]):
-            return {"messages": [HumanMessage(content="TOOL: retriever")]}
+        if _ROUTE_PATTERN.search(last_message):
+            # no placeholder message needed: the tool nodes read the question from state["question"]
+            return {"route": "tool", "question": last_message}
         else:
-            prompt = ChatPromptTemplate.from_template(
-                "You are a helpful assistant. Answer the user directly.\n\nQuestion: {question}\nAnswer:"
-            )
-            chain = prompt | self.llm | StrOutputParser()
-            response = chain.invoke({"question": last_message})
-            return {"messages": [HumanMessage(content=response)]}
-
-    async def _vector_retriever(self, state: AgentState):
+            response = self._assistant_chain.invoke({"question": last_message})
+            return {"messages": [HumanMessage(content=response)], "route": "end", "question": last_message}
+
+    async def _fetch_products(self, query: str) -> str:
         # you can't await inside a sync function, thus we use async def
         # The async approach (File 2) is superior because:
         # Non-blocking - doesn't freeze the workflow
         # Better resource usage - doesn't create new event loops
         # Consistent with LangGraph - LangGraph expects async nodes
         # Scalable - multiple async operations can run concurrently
-        print("--- RETRIEVER (MCP) ---")
-        query = state["messages"][-1].content
-        tool = next(t for t in self.mcp_tools if t.name == "get_product_info")
+        if not self.use_mcp:
+            docs = await self.retriever_obj.acall_retriever(query)
+            return format_docs(docs, empty="No relevant documents found.")
+
+        tool = self.mcp_tools_by_name["get_product_info"]
         result= await tool.ainvoke({"query": query})
-        context = result if result else "No data"
-        return {"messages": [HumanMessage(content=context)]}
+        return result if result else "No data"
+
+    async def _fetch_web(self, query: str) -> str:
+        if not self.use_mcp:
+            result = await self.web_search_tool.ainvoke(query)
+        else:
+            tool = self.mcp_tools_by_name["web_search"]
+            result = await tool.ainvoke({"query": query})
+        return result if result else "No data from web"
+
+    @staticmethod
+    async def _safe(fetch, fallback: str) -> str:
+        # a failing source (e.g. rate-limited DuckDuckGo) degrades to `fallback` instead of failing the whole run
+        try:
+            return await fetch
+        except Exception as e:
+            print(f"--- FETCH FAILED: {e} ---")
+            return fallback
+
+    async def _dual_fetch(self, state: AgentState):
+        # retriever and web search run concurrently, so a weak retrieval doesn't
+        # cost grader + rewriter + web search one after another
+        print("--- RETRIEVER + WEB SEARCH ---")
+        question = state["question"]
+        docs, web = await asyncio.gather(
+            self._safe(self._fetch_products(question), "No data"),
+            self._safe(self._fetch_web(question), "No data from web"),
+        )
+        return {"messages": [HumanMessage(content=docs)], "web_context": web}
 
-    def _web_search(self, state: AgentState):
-        print("--- WEB SEARCH (MCP) ---")
+    async def _web_search(self, state: AgentState):
+        # async node: LangGraph awaits it on the running loop (asyncio.run here would fail inside ainvoke)
+        print("--- WEB SEARCH ---")
         query = state["messages"][-1].content
-        tool = next(t for t in self.mcp_tools if t.name == "web_search")
-        result = asyncio.run(tool.ainvoke({"query": query}))
-        context = result if result else "No data from web"
+        context = await self._safe(self._fetch_web(query), "No data from web")
         return {"messages": [HumanMessage(content=context)]}
 
-    def _grade_documents(self, state: AgentState) -> Literal["generator", "rewriter"]:
+    def _similarity(self, q_emb, d_emb) -> float:
+        q_emb, d_emb = np.asarray(q_emb), np.asarray(d_emb)
+        return float(np.dot(q_emb, d_emb) / (np.linalg.norm(q_emb) * np.linalg.norm(d_emb)))
+
+    async def _grade_documents(self, state: AgentState):
+        # picks the retriever context if relevant, otherwise the web context;
+        # the rewriter is only used when both are weak.
+        # cosine similarity of question and context embeddings instead of an LLM call: question, docs and
+        # web context are embedded together (one EmbedBatcher request) and the question vector is reused
         print("--- GRADER ---")
-        question = state["messages"][0].content
+        question = state["question"]
         docs = state["messages"][-1].content
+        web = state.get("web_context", "")
 
-        prompt = PromptTemplate(
-            template="""You are a grader. Question: {question}\nDocs: {docs}\n
-            Are docs relevant to the question? Answer yes or no.""",
-            input_variables=["question", "docs"],
-        )
-        chain = prompt | self.llm | StrOutputParser()
-        score = chain.invoke({"question": question, "docs": docs})
-        return "generator" if "yes" in score.lower() else "rewriter"
+        # the head of a context is enough for a relevance check
+        texts = [question, docs[:self.grade_max_chars]] + ([web[:self.grade_max_chars]] if web else [])
+        q_emb, d_emb, *w_emb = await asyncio.gather(*[self.embeddings.aembed_query(t) for t in texts])
 
-    def _generate(self, state: AgentState):
+        if self._similarity(q_emb, d_emb) > self.grade_threshold:
+            return {"context_ok": True}
+        if w_emb and self._similarity(q_emb, w_emb[0]) > self.grade_threshold:
+            return {"messages": [HumanMessage(content=web)], "context_ok": True}
+        return {"context_ok": False}
+
+    async def _generate(self, state: AgentState, config: RunnableConfig):
+        # streamed, so callers of stream() see tokens as soon as they are produced.
+        # config is passed on explicitly: on Python 3.10 callbacks don't propagate to nested async runnables by themselves
         print("--- GENERATE ---")
-        question = state["messages"][0].content
+        question = state["question"]
         docs = state["messages"][-1].content
-        prompt = ChatPromptTemplate.from_template(
-            PROMPT_REGISTRY[PromptType.PRODUCT_BOT].template
-        )
-        chain = prompt | self.llm | StrOutputParser()
-        response = chain.invoke({"context": docs, "question": question})
-        return {"messages": [HumanMessage(content=response)]}
+        chunks = []
+        async for chunk in self._generator_chain.astream({"context": docs, "question": question}, config=config):
+            chunks.append(chunk)
+        return {"messages": [HumanMessage(content="".join(chunks))]}
 
     def _rewrite(self, state: AgentState):
         print("--- REWRITE ---")
-        question = state["messages"][0].content
-        prompt = ChatPromptTemplate.from_template(
-            "Rewrite this user query to make it more clear and specific for a search engine. "
-            "Do NOT answer the query. Only rewrite it.\n\nQuery: {question}\nRewritten Query:"
-        )
-        chain = prompt | self.llm | StrOutputParser()
-        new_q = chain.invoke({"question": question})
+        question = state["question"]
+        new_q = self._rewriter_chain.invoke({"question": question})
         return {"messages": [HumanMessage(content=new_q.strip())]}
 
 
@@ -120,7 +206,8 @@ class AgenticRAG:
     def _build_workflow(self):
         workflow = StateGraph(self.AgentState)
         workflow.add_node("Assistant", self._ai_assistant)
-        workflow.add_node("Retriever", self._vector_retriever)
+        workflow.add_node("DualFetch", self._dual_fetch)
+        workflow.add_node("Grader", self._grade_documents)
         workflow.add_node("Generator", self._generate)
         workflow.add_node("Rewriter", self._rewrite)
         workflow.add_node("WebSearch", self._web_search)
@@ -130,20 +217,21 @@ class AgenticRAG:
             "Assistant",
             
             # lambda anon function. Syntax: <parameter/input>: <expression/return value>
-            lambda state: "Retriever" if "TOOL" in state["messages"][-1].content else END, # if assistant says TOOL, then I go to retriever tool
+            lambda state: "DualFetch" if state.get("route") == "tool" else END, # if assistant chose the tools, then I fetch retriever + web context
             
-            { # from assistant either I go to retriever tool or I end the process
-                "Retriever": "Retriever", 
+            { # from assistant either I go to the tools or I end the process
+                "DualFetch": "DualFetch", 
                  END: END
              },
         )
+        workflow.add_edge("DualFetch", "Grader")
         workflow.add_conditional_edges(
             
-            "Retriever",
+            "Grader",
             
-            self._grade_documents,
+            lambda state: "generator" if state.get("context_ok") else "rewriter",
             
-            {"generator": "Generator", # if the documents are relevant (returned yes), then I go to generator
+            {"generator": "Generator", # if retriever or web context is relevant, then I go to generator
              
              "rewriter": "Rewriter"},
         )
@@ -158,19 +246,61 @@ class AgenticRAG:
     # ---------- Public Run ----------
     async def run(self, query: str, thread_id: str = "default_thread") -> str:
         """Run the workflow for a given query and return the final answer."""
-        # Initialize MCP tools if not already done
-        if self.mcp_tools is None:
+        # Open the checkpointer / load MCP tools if not already done (no-op when built with create_agentic_rag)
+        if not self._initialized:
             await self.async_init()
         
         result = await self.app.ainvoke({"messages": [HumanMessage(content=query)]},
                                         config={"configurable": {"thread_id": thread_id}})
         return result["messages"][-1].content
 
+    async def stream(self, query: str, thread_id: str = "default_thread") -> AsyncIterator[str]:
+        """Run the workflow and yield the final answer token by token as the Generator produces it.
+        Questions the Assistant answers directly never reach the Generator; their answer is yielded in one piece."""
+        if not self._initialized:
+            await self.async_init()
+
+        config = {"configurable": {"thread_id": thread_id}}
+        streamed = False
+        async for event in self.app.astream_events({"messages": [HumanMessage(content=query)]},
+                                                   config=config,
+                                                   version="v2"):
+            # only LLM tokens of the Generator node are the answer (Assistant / Rewriter use the LLM too)
+            if event["event"] == "on_chat_model_stream" and event["metadata"].get("langgraph_node") == "Generator":
+                token = event["data"]["chunk"].content
+                if token:
+                    streamed = True
+                    yield token
+
+        if not streamed:
+            # route "end": the answer is the Assistant's message in the final state
+            state = await self.app.aget_state(config)
+            yield state.values["messages"][-1].content
+
+
+async def create_agentic_rag(use_mcp: bool = True) -> AgenticRAG:
+    """Build an AgenticRAG with the checkpointer opened and the MCP tools already loaded.
+    Meant to be called once at server startup, so the MCP subprocess is spawned and the graph compiled only once.
+    Call `aclose()` on shutdown."""
+    inst = AgenticRAG(use_mcp=use_mcp)
+    await inst.async_init()
+    if not use_mcp:
+        # the in-process retriever connects to AstraDB (blocking) on first load: do it here, not inside a request
+        inst.retriever_obj.load_retriever()
+    return inst
+
 
 if __name__ == "__main__":
-    rag_agent = AgenticRAG()
-    answer = rag_agent.run("What is the price of iPhone 16?")
-    print("\nFinal Answer:\n", answer)
+    async def main():
+        rag_agent = await create_agentic_rag()
+        try:
+            print("\nFinal Answer:\n")
+            async for token in rag_agent.stream("What is the price of iPhone 16?"):
+                print(token, end="", flush=True)
+        finally:
+            await rag_agent.aclose()
+
+    asyncio.run(main())
 
 # You can use either lambda for conditional edges or actual functions.
 # def route_to_retriever_or_end(state):
@@ -3,11 +3,12 @@ from langchain_core.output_parsers import StrOutputParser # parse the output of
 from langchain_core.prompts import ChatPromptTemplate # prompt template for the llm
 
 from prompt_library.prompts import PROMPT_REGISTRY, PromptType
-from retriever.retrieval import Retriever
+from retriever.retrieval import get_retriever
+from retriever.doc_format import format_docs as _format_docs
 from utils.model_loader import ModelLoader
 from evaluation.ragas_eval import evaluate_context_precision, evaluate_response_relevancy
 
-retriever_obj = Retriever()
+retriever_obj = get_retriever()
 model_loader = ModelLoader()
 
 
@@ -15,21 +16,7 @@ def format_docs(docs) -> str:
     """Format retrieved documents into a structured text block for the prompt.
     This information will be passed to the llm as context.
     If any of the keys are missing, we will use 'N/A' as the value."""
-    if not docs:
-        return "No relevant documents found."
-
-    formatted_chunks = []
-    for d in docs:
-        meta = d.metadata or {}
-        formatted = ( # it's a single multiple line string expression. You don't need + sign between the lines.
-            f"Title: {meta.get('product_title', 'N/A')}\n"
-            f"Price: {meta.get('price', 'N/A')}\n"
-            f"Rating: {meta.get('rating', 'N/A')}\n"
-            f"Reviews:\n{d.page_content.strip()}"
-        )
-        formatted_chunks.append(formatted)
-
-    return "\n\n---\n\n".join(formatted_chunks)
+    return _format_docs(docs, empty="No relevant documents found.")
 
 
 def build_chain(query):
@@ -73,7 +60,7 @@ def invoke_chain(query: str, debug: bool = False):
 if __name__=='__main__':
     user_query = "Can you suggest me a good DELL laptop?"
      
-    #retriever_obj = Retriever()
+    #retriever_obj = get_retriever()
     
     #retrieved_docs = retriever_obj.call_retriever(user_query)
     
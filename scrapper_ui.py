@@ -47,14 +47,13 @@ if st.button("🚀 Start Scraping"):
     if not product_inputs:
         st.warning("⚠️ Please enter at least one product name or a product description.")
     else:
-        # Initialize scraper with selected platform
-        scraper = EcommerceScraper(platform=platform)
-        
         final_data = []
-        for query in product_inputs:
-            st.write(f"🔍 Searching for: {query} on {platform}")
-            results = scraper.scrape_products(query, max_products=max_products, review_count=review_count)
-            final_data.extend(results)
+        # Initialize scraper with selected platform (one browser shared by all queries)
+        with EcommerceScraper(platform=platform) as scraper:
+            for query in product_inputs:
+                st.write(f"🔍 Searching for: {query} on {platform}")
+                results = scraper.scrape_products(query, max_products=max_products, review_count=review_count)
+                final_data.extend(results)
 
         unique_products = {}
         for row in final_data:
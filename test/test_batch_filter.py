@@ -0,0 +1,50 @@
+import asyncio
+from langchain_core.documents import Document
+from langchain_core.language_models.fake import FakeListLLM
+from prod_assistant.retriever.batch_filter import BatchedLLMFilter
+
+DOCS = [Document(page_content=f"review {i}") for i in range(3)]
+
+
+def _filter(answer):
+    return BatchedLLMFilter(llm=FakeListLLM(responses=[answer]))
+
+
+def test_keeps_documents_at_returned_indices():
+    kept = _filter("[2, 0]").compress_documents(DOCS, "query")
+    assert kept == [DOCS[2], DOCS[0]]
+
+
+def test_empty_list_drops_everything():
+    assert _filter("[]").compress_documents(DOCS, "query") == []
+
+
+def test_last_list_in_answer_wins():
+    # reasoning models may mention other lists while "thinking" before the final answer
+    answer = "<think>maybe [0, 1, 2]?</think> [1]"
+    assert _filter(answer).compress_documents(DOCS, "query") == [DOCS[1]]
+
+
+def test_out_of_range_and_duplicate_indices_are_ignored():
+    kept = _filter("[1, 1, 7]").compress_documents(DOCS, "query")
+    assert kept == [DOCS[1]]
+
+
+def test_unparseable_answer_keeps_everything():
+    assert _filter("all of them look relevant").compress_documents(DOCS, "query") == DOCS
+
+
+def test_no_documents_skips_llm_call():
+    # FakeListLLM with no responses would fail if it were called
+    assert BatchedLLMFilter(llm=FakeListLLM(responses=[])).compress_documents([], "query") == []
+
+
+def test_prompt_lists_documents_with_indices():
+    prompt = _filter("[]")._build_prompt(DOCS, "cheap phone")
+    assert "Query: cheap phone" in prompt
+    assert "[0] review 0\n[1] review 1\n[2] review 2" in prompt
+
+
+def test_acompress_documents():
+    kept = asyncio.run(_filter("[0]").acompress_documents(DOCS, "query"))
+    assert kept == [DOCS[0]]
@@ -0,0 +1,28 @@
+from langchain_core.documents import Document
+from prod_assistant.retriever.doc_format import format_docs, review_text
+
+META = {"product_title": "Apple iPhone 15", "price": "69,900", "rating": "4.6"}
+
+
+def test_review_text_strips_ingestion_prefix():
+    doc = Document(page_content="Apple iPhone 15 | price 69,900 | rating 4.6\nGreat camera.", metadata=META)
+    assert review_text(doc) == "Great camera."
+
+
+def test_review_text_keeps_content_without_prefix():
+    doc = Document(page_content="  Great camera.  ", metadata=META)
+    assert review_text(doc) == "Great camera."
+
+
+def test_format_docs_prints_metadata_once():
+    doc = Document(page_content="Apple iPhone 15 | price 69,900 | rating 4.6\nGreat camera.", metadata=META)
+    assert format_docs([doc, doc]) == (
+        "Title: Apple iPhone 15\nPrice: 69,900\nRating: 4.6\nReviews:\nGreat camera."
+        "\n\n---\n\n"
+        "Title: Apple iPhone 15\nPrice: 69,900\nRating: 4.6\nReviews:\nGreat camera."
+    )
+
+
+def test_format_docs_empty():
+    assert format_docs([]) == ""
+    assert format_docs([], empty="No relevant documents found.") == "No relevant documents found."
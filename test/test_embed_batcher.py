@@ -0,0 +1,92 @@
+import asyncio
+from typing import List
+from langchain_core.embeddings import Embeddings
+from prod_assistant.retriever.embed_batcher import EmbedBatcher
+
+
+class _RecordingEmbeddings(Embeddings):
+    """Embeds a text as [len(text)] and records every batch request."""
+
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [[float(len(t))] for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return [float(len(text))]
+
+    async def aembed_documents(self, texts: List[str], task_type=None) -> List[List[float]]:
+        self.batches.append((list(texts), task_type))
+        await asyncio.sleep(0)
+        if self.fail:
+            raise RuntimeError("embedding API down")
+        return self.embed_documents(texts)
+
+
+def test_concurrent_queries_share_one_request():
+    embeddings = _RecordingEmbeddings()
+    batcher = EmbedBatcher(embeddings)
+
+    async def main():
+        return await asyncio.gather(*[batcher.aembed_query("x" * i) for i in range(1, 4)])
+
+    assert asyncio.run(main()) == [[1.0], [2.0], [3.0]]
+    assert embeddings.batches == [(["x", "xx", "xxx"], "RETRIEVAL_QUERY")]
+
+
+def test_batches_never_exceed_max_batch_size():
+    embeddings = _RecordingEmbeddings()
+    batcher = EmbedBatcher(embeddings, max_batch_size=3)
+
+    async def main():
+        return await asyncio.gather(*[batcher.aembed_query("x" * i) for i in range(1, 8)])
+
+    assert asyncio.run(main()) == [[float(i)] for i in range(1, 8)]
+    assert [len(texts) for texts, _ in embeddings.batches] == [3, 3, 1]
+
+
+def test_sequential_queries_are_sent_separately():
+    embeddings = _RecordingEmbeddings()
+    batcher = EmbedBatcher(embeddings)
+
+    async def main():
+        return [await batcher.aembed_query("a"), await batcher.aembed_query("bb")]
+
+    assert asyncio.run(main()) == [[1.0], [2.0]]
+    assert len(embeddings.batches) == 2
+
+
+def test_error_is_raised_in_every_waiting_query():
+    batcher = EmbedBatcher(_RecordingEmbeddings(fail=True))
+
+    async def main():
+        return await asyncio.gather(batcher.aembed_query("a"), batcher.aembed_query("b"), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_cancelled_flush_does_not_block_later_queries():
+    embeddings = _RecordingEmbeddings()
+    batcher = EmbedBatcher(embeddings)
+
+    async def main():
+        pending = asyncio.ensure_future(batcher.aembed_query("a"))
+        await asyncio.sleep(0)  # the query is queued and its flush scheduled
+        batcher._flush_task.cancel()
+        await asyncio.sleep(0)
+        # the next query schedules a new flush that also sends the stranded one
+        later = await asyncio.wait_for(batcher.aembed_query("bb"), timeout=1)
+        return await pending, later
+
+    assert asyncio.run(main()) == ([1.0], [2.0])
+
+
+def test_sync_methods_pass_through():
+    embeddings = _RecordingEmbeddings()
+    batcher = EmbedBatcher(embeddings)
+    assert batcher.embed_query("abc") == [3.0]
+    assert batcher.embed_documents(["a", "bb"]) == [[1.0], [2.0]]
+    assert embeddings.batches == []
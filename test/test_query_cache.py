@@ -0,0 +1,65 @@
+from prod_assistant.retriever import query_cache
+from prod_assistant.retriever.query_cache import QueryCache
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_get_returns_stored_value():
+    cache = QueryCache()
+    cache.put("dell laptop", ["doc"])
+    assert cache.get("dell laptop") == ["doc"]
+    assert cache.get("iphone") is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = QueryCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")  # "b" is now the least recently used
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_expired_entry_is_treated_as_missing(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(query_cache.time, "monotonic", clock)
+    cache = QueryCache(ttl_seconds=10)
+    cache.put("a", 1)
+
+    clock.now += 10
+    assert cache.get("a") == 1
+    clock.now += 1
+    assert cache.get("a") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_put_refreshes_ttl(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(query_cache.time, "monotonic", clock)
+    cache = QueryCache(ttl_seconds=10)
+    cache.put("a", 1)
+    clock.now += 8
+    cache.put("a", 2)
+    clock.now += 8
+
+    assert cache.get("a") == 2
+
+
+def test_stats_and_clear():
+    cache = QueryCache()
+    cache.put("a", 1)
+    cache.get("a")
+    cache.get("b")
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 1, "hit_rate": 0.5}
+
+    cache.clear()
+    assert cache.stats() == {"hits": 0, "misses": 0, "size": 0, "hit_rate": 0.0}